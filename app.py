@@ -1,58 +1,185 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
+import numpy as np
+import altair as alt
 from wordcloud import WordCloud
-import json
-import random
+import hashlib
+import pickle
+import sqlite3
+from bisect import bisect_left
+from contextlib import closing
 from io import BytesIO
 
 # ---------------------------------
 # Load Data
 # ---------------------------------
-@st.cache_data
-def load_data():
-    tweets_per_day = pd.read_csv("tweets_per_day.csv")
-    tweets_per_day_by_user = pd.read_csv("tweets_per_day_by_user.csv")
+USER_STORE = "user_data.sqlite"
+TABLE_FILES = ("tweets_per_day.parquet", "tweets_per_day_by_user.parquet")
+
+def file_digests(paths):
+    """Content hashes of the given files, used to key caches that outlive the process."""
+    digests = []
+    for path in paths:
+        with open(path, "rb") as f:
+            digests.append(hashlib.sha256(f.read()).hexdigest())
+    return tuple(digests)
+
+def cumulative_counts(data):
+    """Zero-prefixed cumulative tweet counts of a frame, so the total over rows
+       [lo, hi) is cum[hi] - cum[lo]. Kept outside the frame: DataFrame.attrs
+       would be deep-copied into every slice and pickled into every cache entry."""
+    counts = data["Tweet Count"].to_numpy()
+    return np.concatenate([[0], counts.cumsum()])
+
+# The cache is persisted to disk, so it is keyed on the Parquet contents:
+# rerunning build_data.py invalidates it even without clearing ~/.streamlit/cache.
+@st.cache_data(persist="disk", show_spinner="Loading tweet data…")
+def load_data(table_digests):
+    # The Parquet files are produced from the raw CSV exports by build_data.py.
+    # Keep the frames sorted so filtering is a binary search
+    tweets_per_day = pd.read_parquet(TABLE_FILES[0])
+    tweets_per_day = tweets_per_day.sort_values("Date").reset_index(drop=True)
+    tweets_per_day["RollingAvg"] = tweets_per_day["Tweet Count"].rolling(window=7).mean()
+    overall_cum = cumulative_counts(tweets_per_day)
+    tweets_per_day_by_user = pd.read_parquet(TABLE_FILES[1])
+    tweets_per_day_by_user["Author"] = tweets_per_day_by_user["Author"].astype("category")
+
+    # Split per user once so a user switch is a dict lookup instead of a full-frame scan
+    by_user = {
+        author: group.sort_values("Date").reset_index(drop=True)
+        for author, group in tweets_per_day_by_user.groupby("Author", observed=True, sort=False)
+    }
+    for user_data in by_user.values():
+        user_data["RollingAvg"] = user_data["Tweet Count"].rolling(window=7).mean()
+    cum_by_user = {author: cumulative_counts(user_data) for author, user_data in by_user.items()}
+    usernames = tweets_per_day_by_user["Author"].cat.categories.tolist()
+    min_date = tweets_per_day["Date"].iloc[0].date()
+    max_date = tweets_per_day["Date"].iloc[-1].date()
     
+    return tweets_per_day, by_user, overall_cum, cum_by_user, usernames, min_date, max_date
+
+# Read-only text/chain data is cached as a shared resource: st.cache_data would
+# pickle and copy these large objects on every rerun.
+@st.cache_resource
+def load_overall_wordcloud_text():
     with open("overall_wordcloud.txt", "r", encoding="utf-8") as f:
-        overall_wordcloud_text = f.read()
-    with open("user_wordcloud_text.json", "r", encoding="utf-8") as f:
-        user_wordcloud_text = json.load(f)
-    with open("markov_chains.json", "r", encoding="utf-8") as f:
-        markov_chains = json.load(f)
-        
-    return tweets_per_day, tweets_per_day_by_user, overall_wordcloud_text, user_wordcloud_text, markov_chains
+        return f.read()
+
+# Per-user texts and chains live in one SQLite file (built by build_data.py)
+# and are read only when that user is selected.
+def query_user_store(sql, user):
+    with closing(sqlite3.connect(f"file:{USER_STORE}?mode=ro", uri=True)) as conn:
+        return conn.execute(sql, (user,)).fetchone()
+
+@st.cache_data(show_spinner=False)
+def load_user_wordcloud_text(user):
+    row = query_user_store("SELECT text FROM wordcloud_text WHERE user = ?", user)
+    return row[0] if row else ""
 
-tweets_per_day, tweets_per_day_by_user, overall_wordcloud_text, user_wordcloud_text, markov_chains = load_data()
+@st.cache_resource(show_spinner=False)
+def load_markov_chain(user):
+    row = query_user_store("SELECT chain FROM markov_chains WHERE user = ?", user)
+    return pickle.loads(row[0]) if row else None
+
+tweets_per_day, by_user, overall_cum, cum_by_user, usernames, min_date, max_date = load_data(file_digests(TABLE_FILES))
+overall_wordcloud_text = load_overall_wordcloud_text()
 
 # ---------------------------------
 # Helper Functions
 # ---------------------------------
-def filter_by_date(data, start_date, end_date):
-    data["Date"] = pd.to_datetime(data["Date"], errors="coerce")
-    return data[(data["Date"] >= pd.to_datetime(start_date)) & (data["Date"] <= pd.to_datetime(end_date))]
+def date_bounds(data, start_date, end_date):
+    """Return the row bounds [lo, hi) of the inclusive [start_date, end_date] range in a Date-sorted frame."""
+    dates = data["Date"].values
+    lo = int(np.searchsorted(dates, np.datetime64(start_date)))
+    hi = int(np.searchsorted(dates, np.datetime64(end_date), side="right"))
+    return lo, hi
+
+def get_plot_frame(data, lo, hi, rolling):
+    """Columns to plot for rows [lo, hi) of a Date-sorted frame."""
+    columns = ["Date", "Tweet Count"] + (["RollingAvg"] if rolling else [])
+    return data.iloc[lo:hi][columns]
+
+def total_tweets_between(cum, lo, hi):
+    """Total tweets in rows [lo, hi), read off precomputed cumulative counts."""
+    return int(cum[hi] - cum[lo])
+
+def most_active_day_between(data, lo, hi):
+    """Return (date, tweet count) of the busiest day in rows [lo, hi); the range must be non-empty."""
+    i = lo + int(data["Tweet Count"].to_numpy()[lo:hi].argmax())
+    return data["Date"].iloc[i], int(data["Tweet Count"].iloc[i])
+
+@st.cache_data(show_spinner=False)
+def render_wordcloud(text):
+    """Render a word cloud once per distinct text and return it as PNG bytes."""
+    wc = WordCloud(width=800, height=400, background_color="white").generate(text)
+    buf = BytesIO()
+    wc.to_image().save(buf, "PNG")
+    return buf.getvalue()
+
+def tweets_per_day_chart(data, title, color, show_rolling_avg=False):
+    """Build an Altair line chart of daily tweet counts, optionally with the 7-day rolling average."""
+    series = {"Tweet Count": "Daily Tweet Count"}
+    colors = [color]
+    if show_rolling_avg:
+        series["RollingAvg"] = "7-Day Rolling Avg"
+        colors.append("red")
+
+    plot_data = data[["Date"] + list(series)].rename(columns=series)
+    base = (
+        alt.Chart(plot_data)
+        .transform_fold(list(series.values()), as_=["Series", "Value"])
+        .encode(
+            x=alt.X("Date:T", title="Date", axis=alt.Axis(tickCount=10, labelAngle=-45)),
+            y=alt.Y("Value:Q", title="Tweet Count"),
+            color=alt.Color("Series:N", scale=alt.Scale(domain=list(series.values()), range=colors), title=None),
+            tooltip=[alt.Tooltip("Date:T"), alt.Tooltip("Series:N"), alt.Tooltip("Value:Q", format=".1f")],
+        )
+    )
+    # Daily counts get point markers; the rolling average is a plain, thicker line
+    chart = base.transform_filter(alt.datum.Series == series["Tweet Count"]).mark_line(
+        strokeWidth=1.5, point=alt.OverlayMarkDef(size=12)
+    )
+    if show_rolling_avg:
+        chart += base.transform_filter(alt.datum.Series == series["RollingAvg"]).mark_line(strokeWidth=2)
+    return chart.properties(title=title)
 
 def generate_markov_tweet(chain, length=20, seed=None):
-    """Generate a Markov chain-based tweet of a given length. 
-       If 'seed' is provided (and exists in the chain), start from that seed word.
-       Otherwise, start from a random word."""
-    if not chain:
+    """Generate a Markov chain-based tweet of a given length.
+       'chain' is a CSR tuple (vocab, offsets, successors) from build_data.py: the
+       next-word ids of word i are successors[offsets[i]:offsets[i + 1]].
+       If 'seed' is provided and is a vocab word with successors, start from it;
+       otherwise start from a random word that has successors. The tweet ends
+       early at a word with no successors. Returns a placeholder message when
+       'chain' is None or has no transitions at all."""
+    if not chain or not len(chain[2]):
         return "Not enough data to generate a tweet."
+    vocab, offsets, successors = chain
+    rng = np.random.default_rng()
     
-    # Use seed if provided and valid
-    if seed and seed in chain:
-        word = seed
-    else:
-        word = random.choice(list(chain.keys()))
+    # Use seed if provided and valid (vocab is sorted, so look it up by bisection)
+    idx = bisect_left(vocab, seed) if seed else len(vocab)
+    if idx == len(vocab) or vocab[idx] != seed or offsets[idx] == offsets[idx + 1]:
+        idx = rng.choice(np.flatnonzero(np.diff(offsets)))
     
-    tweet_words = [word]
+    tweet_ids = [idx]
     for _ in range(length - 1):
-        next_words = chain.get(word, [])
-        if not next_words:
+        start, end = offsets[idx], offsets[idx + 1]
+        if start == end:
             break
-        word = random.choice(next_words)
-        tweet_words.append(word)
-    return " ".join(tweet_words)
+        idx = successors[rng.integers(start, end)]
+        tweet_ids.append(idx)
+    return " ".join(vocab[i] for i in tweet_ids)
+
+@st.fragment
+def markov_section(chain):
+    """Tweet generator controls; runs as a fragment so its widgets don't rerun the whole page."""
+    with st.expander("Tweet Generation Settings"):
+        tweet_length = st.slider("Select Tweet Length (in words)", min_value=5, max_value=50, value=20, step=5)
+        seed_text = st.text_input("Optional Seed Text (Experimental)", "")
+
+    if st.button("Generate Tweet"):
+        generated_tweet = generate_markov_tweet(chain, length=tweet_length, seed=seed_text)
+        st.markdown(f"> **{generated_tweet}**")  # Block quote style
 
 
 # ---------------------------------
@@ -77,15 +204,12 @@ default_start_date = "2023-12-31"
 default_end_date = "2024-12-23"
 
 # User selection
-usernames = tweets_per_day_by_user["Author"].unique()
-selected_user = st.sidebar.selectbox("Select a Username", ["Overall"] + list(usernames))
+selected_user = st.sidebar.selectbox("Select a Username", ["Overall"] + usernames)
 
 # Date range selection
 start_date = st.sidebar.date_input("Start Date", pd.to_datetime(default_start_date))
 end_date = st.sidebar.date_input("End Date", pd.to_datetime(default_end_date))
 
-min_date = pd.to_datetime(tweets_per_day["Date"]).min().date()
-max_date = pd.to_datetime(tweets_per_day["Date"]).max().date()
 date_range = st.sidebar.slider(
     "Adjust Date Range (Slider)",
     min_value=min_date,
@@ -108,46 +232,22 @@ if selected_user == "Overall":
     # Overall Tweets per Day
     # ---------------------------------
     st.subheader("Overall Tweets per Day")
-    filtered_data = filter_by_date(tweets_per_day, start_date, end_date)
-
-    fig, ax = plt.subplots()
-    ax.plot(
-        filtered_data["Date"],
-        filtered_data["Tweet Count"],
-        marker="o",
-        markersize=3,
-        label="Daily Tweet Count"
-    )
-
-    # Optionally show rolling average
-    if show_rolling_avg:
-        filtered_data["RollingAvg"] = filtered_data["Tweet Count"].rolling(window=7).mean()
-        ax.plot(
-            filtered_data["Date"],
-            filtered_data["RollingAvg"],
-            color="red",
-            linewidth=2,
-            label="7-Day Rolling Avg"
-        )
+    lo, hi = date_bounds(tweets_per_day, start_date, end_date)
+    plot_data = get_plot_frame(tweets_per_day, lo, hi, show_rolling_avg)
 
-    ax.set_xlabel("Date")
-    ax.set_ylabel("Tweet Count")
-    ax.set_title("Overall Tweets Per Day")
-    ax.xaxis.set_major_locator(plt.MaxNLocator(nbins=10))
-    plt.xticks(rotation=45)
-    plt.legend()
-    st.pyplot(fig)
+    chart = tweets_per_day_chart(plot_data, "Overall Tweets Per Day", "#1f77b4", show_rolling_avg)
+    st.altair_chart(chart, use_container_width=True)
 
     # ---------------------------------
     # Overall Word Cloud
     # ---------------------------------
     st.subheader("Overall Word Cloud")
-    wc = WordCloud(width=800, height=400, background_color="white").generate(overall_wordcloud_text)
-    st.image(wc.to_array(), use_container_width=True)
+    png = render_wordcloud(overall_wordcloud_text)
+    st.image(png, use_container_width=True)
 
     st.download_button(
         label="Download Word Cloud",
-        data=BytesIO(wc.to_image().tobytes()),
+        data=png,
         file_name="overall_wordcloud.png",
         mime="image/png"
     )
@@ -155,7 +255,7 @@ if selected_user == "Overall":
     # ---------------------------------
     # Total Tweets (Selected Range)
     # ---------------------------------
-    total_tweets = int(filtered_data["Tweet Count"].sum())
+    total_tweets = total_tweets_between(overall_cum, lo, hi)
 
     st.metric(label="Total Tweets (Selected Range)", value=f"{total_tweets:,}")
 
@@ -164,51 +264,26 @@ else:
     # User-Specific Tweets Per Day
     # ---------------------------------
     st.subheader(f"Tweets Per Day for {selected_user}")
-    user_data = tweets_per_day_by_user[tweets_per_day_by_user["Author"] == selected_user]
-    filtered_data = filter_by_date(user_data, start_date, end_date)
-
-    fig, ax = plt.subplots()
-    ax.plot(
-        filtered_data["Date"],
-        filtered_data["Tweet Count"],
-        marker="o",
-        markersize=3,
-        color="green",
-        label="Daily Tweet Count"
-    )
-
-    # Optionally show rolling average
-    if show_rolling_avg:
-        filtered_data["RollingAvg"] = filtered_data["Tweet Count"].rolling(window=7).mean()
-        ax.plot(
-            filtered_data["Date"],
-            filtered_data["RollingAvg"],
-            color="red",
-            linewidth=2,
-            label="7-Day Rolling Avg"
-        )
+    user_data = by_user[selected_user]
+    lo, hi = date_bounds(user_data, start_date, end_date)
+    plot_data = get_plot_frame(user_data, lo, hi, show_rolling_avg)
 
-    ax.set_xlabel("Date")
-    ax.set_ylabel("Tweet Count")
-    ax.set_title(f"Tweets Per Day for {selected_user}")
-    ax.xaxis.set_major_locator(plt.MaxNLocator(nbins=10))
-    plt.xticks(rotation=45)
-    plt.legend()
-    st.pyplot(fig)
+    chart = tweets_per_day_chart(plot_data, f"Tweets Per Day for {selected_user}", "green", show_rolling_avg)
+    st.altair_chart(chart, use_container_width=True)
 
     # ---------------------------------
     # User-Specific Word Cloud
     # ---------------------------------
     st.subheader(f"Word Cloud for {selected_user}")
-    user_text = user_wordcloud_text.get(selected_user, "")
+    user_text = load_user_wordcloud_text(selected_user)
 
     if user_text:
-        wc = WordCloud(width=800, height=400, background_color="white").generate(user_text)
-        st.image(wc.to_array(), use_container_width=True)
+        png = render_wordcloud(user_text)
+        st.image(png, use_container_width=True)
 
         st.download_button(
             label=f"Download Word Cloud for {selected_user}",
-            data=BytesIO(wc.to_image().tobytes()),
+            data=png,
             file_name=f"{selected_user}_wordcloud.png",
             mime="image/png"
         )
@@ -220,22 +295,14 @@ else:
     # ---------------------------------
     st.subheader(f"Generated Tweet in the Style of {selected_user}")
 
-    chain = markov_chains.get(selected_user, {})
-
-    with st.expander("Tweet Generation Settings"):
-        tweet_length = st.slider("Select Tweet Length (in words)", min_value=5, max_value=50, value=20, step=5)
-        seed_text = st.text_input("Optional Seed Text (Experimental)", "")
-
-    if st.button("Generate Tweet"):
-        generated_tweet = generate_markov_tweet(chain, length=tweet_length, seed=seed_text)
-        st.markdown(f"> **{generated_tweet}**")  # Block quote style
+    markov_section(load_markov_chain(selected_user))
 
     # ---------------------------------
     # Polished Metrics: Total Tweets & Most Active Day
     # ---------------------------------
-    if not filtered_data.empty:
-        total_tweets = int(filtered_data["Tweet Count"].sum())
-        most_active_day = filtered_data.loc[filtered_data["Tweet Count"].idxmax()]
+    if lo < hi:
+        total_tweets = total_tweets_between(cum_by_user[selected_user], lo, hi)
+        most_active_date, most_active_count = most_active_day_between(user_data, lo, hi)
 
         # Create two columns for metrics
         col1, col2 = st.columns(2)
@@ -245,8 +312,8 @@ else:
         )
         col2.metric(
             label="Most Active Day",
-            value=most_active_day["Date"].strftime("%Y-%m-%d"),
-            delta=f"{int(most_active_day['Tweet Count'])} tweets"
+            value=most_active_date.strftime("%Y-%m-%d"),
+            delta=f"{most_active_count} tweets"
         )
     else:
         st.write("No data in the selected range.")
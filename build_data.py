@@ -0,0 +1,73 @@
+"""Convert the raw CSV/JSON exports into the binary files app.py loads.
+
+Run once whenever the source data changes:
+
+    python build_data.py
+"""
+import json
+import os
+import pickle
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+USER_STORE = "user_data.sqlite"
+
+
+def index_markov_chain(chain):
+    """Flatten a {word: [next words]} chain into CSR form (vocab, offsets, successors).
+
+    vocab is the sorted word list. The next-word ids of word i are
+    successors[offsets[i]:offsets[i + 1]], stored in one contiguous int32 array.
+    """
+    vocab = sorted({w for next_words in chain.values() for w in next_words} | set(chain))
+    word2id = {w: i for i, w in enumerate(vocab)}
+
+    counts = np.fromiter((len(chain.get(w, ())) for w in vocab), dtype=np.int32, count=len(vocab))
+    offsets = np.zeros(len(vocab) + 1, dtype=np.int32)
+    np.cumsum(counts, out=offsets[1:])
+    successors = np.fromiter(
+        (word2id[next_word] for w in vocab for next_word in chain.get(w, ())),
+        dtype=np.int32,
+        count=int(offsets[-1]),
+    )
+    return vocab, offsets, successors
+
+
+def build_tables():
+    tweets_per_day = pd.read_csv("tweets_per_day.csv", parse_dates=["Date"])
+    tweets_per_day.sort_values("Date").to_parquet("tweets_per_day.parquet", index=False)
+
+    tweets_per_day_by_user = pd.read_csv("tweets_per_day_by_user.csv", parse_dates=["Date"])
+    tweets_per_day_by_user.sort_values(["Author", "Date"]).to_parquet("tweets_per_day_by_user.parquet", index=False)
+
+
+def build_user_store():
+    """Write per-user word cloud texts and pickled Markov chains to one SQLite file keyed by user."""
+    with open("user_wordcloud_text.json", "r", encoding="utf-8") as f:
+        user_wordcloud_text = json.load(f)
+    with open("markov_chains.json", "r", encoding="utf-8") as f:
+        markov_chains = json.load(f)
+
+    if os.path.exists(USER_STORE):
+        os.remove(USER_STORE)
+    with closing(sqlite3.connect(USER_STORE)) as conn, conn:
+        conn.execute("CREATE TABLE wordcloud_text (user TEXT PRIMARY KEY, text TEXT NOT NULL)")
+        conn.execute("CREATE TABLE markov_chains (user TEXT PRIMARY KEY, chain BLOB NOT NULL)")
+        conn.executemany("INSERT INTO wordcloud_text VALUES (?, ?)", user_wordcloud_text.items())
+        conn.executemany(
+            "INSERT INTO markov_chains VALUES (?, ?)",
+            (
+                (user, pickle.dumps(index_markov_chain(chain), protocol=pickle.HIGHEST_PROTOCOL))
+                for user, chain in markov_chains.items()
+            ),
+        )
+    with closing(sqlite3.connect(USER_STORE)) as conn:
+        conn.execute("VACUUM")
+
+
+if __name__ == "__main__":
+    build_tables()
+    build_user_store()